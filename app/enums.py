@@ -0,0 +1,21 @@
+"""
+Enumeraciones compartidas por los modelos SQLAlchemy y los schemas Pydantic.
+"""
+import enum
+
+
+class TipoDocumento(str, enum.Enum):
+    """Tipos de documento de identidad en Colombia."""
+    CC = "CC"   # Cédula de Ciudadanía
+    CE = "CE"   # Cédula de Extranjería
+    TI = "TI"   # Tarjeta de Identidad
+    PA = "PA"   # Pasaporte
+
+
+class Referido(str, enum.Enum):
+    """Cómo conoció el usuario el devocional."""
+    REDES_SOCIALES = "redes_sociales"
+    AMIGO = "amigo"
+    PARROQUIA = "parroquia"
+    COMUNIDAD = "comunidad"
+    OTRO = "otro"
@@ -9,23 +9,27 @@ Seguridad: Todos los endpoints requieren API Key en header X-API-Key
 
 Cumplimiento: Ley 1581 de 2012 (Protección de Datos Personales - Colombia)
 """
+import hmac
 import os
+import time
+import orjson
 from dotenv import load_dotenv
 
 # Cargar .env sin sobrescribir variables ya existentes (útil para tests)
 load_dotenv(override=False)
 
-from fastapi import FastAPI, Depends, HTTPException, Header, Request, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, func, text
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy.exc import IntegrityError
 from contextlib import asynccontextmanager
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from app.database import get_db, init_db
-from app.models import WaitlistEntry, TipoDocumento as TipoDocumentoModel, Referido as ReferidoModel
+from app.database import get_db, init_db, SessionLocal
+from app.models import WaitlistEntry
 from app.schemas import (
     WaitlistCreate, 
     WaitlistResponse, 
@@ -43,15 +47,58 @@ from app.schemas import (
 
 API_KEY = os.getenv("API_KEY", "tu-api-key-segura-cambiar-en-produccion")
 API_VERSION = "1.0.0"
+ENVIRONMENT = os.getenv("ENV", "development")
 LAUNCH_DATE = os.getenv("LAUNCH_DATE", "2025-02-05")
 
 # Credenciales Admin
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 
+# Mensajes de registro duplicado (HTTP 409)
+MSG_EMAIL_DUPLICADO = "Este correo electrónico ya está registrado en la lista de espera."
+MSG_DOCUMENTO_DUPLICADO = "Este número de documento ya está registrado en la lista de espera."
+
+# A partir de este tamaño /count usa la estimación de PostgreSQL en vez de COUNT(*)
+CONTEO_ESTIMADO_MINIMO = int(os.getenv("CONTEO_ESTIMADO_MINIMO", "10000"))
+
+# Tamaño máximo de página en GET /api/waitlist
+LISTADO_LIMITE_MAXIMO = 500
+
 # Dominios permitidos para CORS (configurar según tu dominio)
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:5500,https://devocionales-taupe.vercel.app").split(",")
 
+# Si el proxy (nginx, Cloud Run, etc.) ya agrega los headers CORS, se omite el middleware
+CORS_EN_PROXY = os.getenv("CORS_EN_PROXY", "").lower() in ("1", "true", "yes")
+
+
+# ID del primer registro de la lista; base para calcular la posición sin
+# recorrer la tabla en cada registro. Se carga al arrancar; si la lista estaba
+# vacía se consulta a la BD tras el primer registro de este proceso, porque con
+# varios workers ese registro no tiene por qué ser el primero de la tabla.
+_min_id: Optional[int] = None
+
+# Última respuesta de /health (monotonic, respuesta); los monitores de uptime
+# lo consultan cada pocos segundos y no hace falta recalcularla en cada sondeo.
+HEALTH_CACHE_TTL = 1.0
+_health_cache: Tuple[float, Optional[HealthCheck]] = (0.0, None)
+
+
+# =============================================================================
+# RESPUESTAS
+# =============================================================================
+
+class RespuestaJSON(ORJSONResponse):
+    """
+    ORJSONResponse que escribe las fechas UTC con sufijo "Z", igual que
+    Pydantic en modo JSON, para que POST y GET devuelvan el mismo formato.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z,
+        )
+
 
 # =============================================================================
 # LIFESPAN (inicialización de BD)
@@ -59,8 +106,14 @@ ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://127
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Inicializa la base de datos al arrancar."""
+    """Inicializa la base de datos y carga el ID inicial de la lista."""
+    global _min_id
     init_db()
+    db = SessionLocal()
+    try:
+        _min_id = db.query(func.min(WaitlistEntry.id)).scalar()
+    finally:
+        db.close()
     yield
 
 
@@ -68,6 +121,11 @@ async def lifespan(app: FastAPI):
 # APLICACIÓN FASTAPI
 # =============================================================================
 
+def openapi_url_segun_entorno(entorno: str) -> Optional[str]:
+    """En producción no se genera ni expone el esquema OpenAPI (ni /docs)."""
+    return None if entorno == "prod" else "/openapi.json"
+
+
 app = FastAPI(
     title="Sembradores de Fe - Lista de Espera API",
     description="""
@@ -89,6 +147,8 @@ Sembradores de Fe - Barranquilla, Colombia
     """,
     version=API_VERSION,
     lifespan=lifespan,
+    openapi_url=openapi_url_segun_entorno(ENVIRONMENT),
+    default_response_class=RespuestaJSON,
     contact={
         "name": "Sembradores de Fe",
         "url": "https://sembradoresdefé.com",
@@ -102,24 +162,79 @@ Sembradores de Fe - Barranquilla, Colombia
 # MIDDLEWARE
 # =============================================================================
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Las rutas de administración de la lista cuelgan de este prefijo y requieren
+# API Key, salvo el registro (POST), que es público. El resto de rutas (health,
+# login, política de datos, docs) y las inexistentes pasan sin verificar, de
+# modo que una ruta desconocida responde 404 y no "API Key requerida".
+# Una ruta nueva que requiera API Key debe colgar de este prefijo.
+PREFIJO_PROTEGIDO = "/api/waitlist"
 
-# =============================================================================
-# DEPENDENCIAS DE SEGURIDAD
-# =============================================================================
 
-async def verify_api_key(x_api_key: str = Header(None)): 
+def requiere_api_key(method: str, path: str) -> bool:
+    """Indica si la petición va a una ruta protegida por API Key."""
+    if method == "OPTIONS":
+        return False
+    if path != PREFIJO_PROTEGIDO and not path.startswith(PREFIJO_PROTEGIDO + "/"):
+        return False
+    # El registro es público, también con barra final (FastAPI redirige)
+    return not (method == "POST" and path.rstrip("/") == PREFIJO_PROTEGIDO)
+
+
+@app.middleware("http")
+async def verify_api_key(request: Request, call_next):
     """
-    Ya no verifica nada. 
-    Permite que la petición pase sin importar la clave.
+    Verifica el header X-API-Key antes de llegar a los endpoints.
+
+    La comparación es en tiempo constante para no filtrar información
+    sobre la clave.
     """
-    return x_api_key
+    if not requiere_api_key(request.method, request.url.path):
+        return await call_next(request)
+
+    x_api_key = request.headers.get("x-api-key")
+    if x_api_key is None:
+        return RespuestaJSON(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            content={
+                "success": False,
+                "error": "API Key requerida en el header X-API-Key",
+                "status_code": status.HTTP_422_UNPROCESSABLE_CONTENT
+            }
+        )
+
+    if not hmac.compare_digest(x_api_key.encode(), API_KEY.encode()):
+        return RespuestaJSON(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={
+                "success": False,
+                "error": "API Key inválida",
+                "status_code": status.HTTP_401_UNAUTHORIZED
+            }
+        )
+
+    return await call_next(request)
+
+
+def registrar_cors(app: FastAPI, en_proxy: bool) -> None:
+    """
+    Agrega CORSMiddleware salvo que el proxy ya ponga los headers CORS.
+
+    Con allow_origins=["*"] Starlette no busca el origen en ninguna lista.
+    """
+    if en_proxy:
+        return
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+
+
+# CORS se registra al final para envolver también las respuestas 401/422
+registrar_cors(app, CORS_EN_PROXY)
 
 
 # =============================================================================
@@ -129,7 +244,7 @@ async def verify_api_key(x_api_key: str = Header(None)):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Manejador personalizado para excepciones HTTP."""
-    return JSONResponse(
+    return RespuestaJSON(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -139,10 +254,95 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
+# =============================================================================
+# CONSULTAS AUXILIARES
+# =============================================================================
+
+# Campos de WaitlistDetail que se devuelven al crear un registro
+DATOS_REGISTRO_CREADO = {"id", "nombre", "apellido", "email", "fecha_registro"}
+
+# Solo las columnas que expone WaitlistDetail (sin ip_registro ni acepta_terminos)
+DETALLE_COLUMNAS = load_only(
+    WaitlistEntry.id,
+    WaitlistEntry.tipo_documento,
+    WaitlistEntry.numero_documento,
+    WaitlistEntry.nombre,
+    WaitlistEntry.apellido,
+    WaitlistEntry.email,
+    WaitlistEntry.indicativo_pais,
+    WaitlistEntry.telefono,
+    WaitlistEntry.ciudad,
+    WaitlistEntry.referido,
+    WaitlistEntry.fecha_registro,
+)
+
+
+def detalle_registro(registro: WaitlistEntry) -> dict:
+    """
+    Convierte un registro en el dict de WaitlistDetail.
+
+    Se arma directamente (sin validar con Pydantic) para devolverlo con
+    RespuestaJSON, que serializa enums y fechas de forma nativa.
+    """
+    return {
+        "id": registro.id,
+        "tipo_documento": registro.tipo_documento,
+        "numero_documento": registro.numero_documento,
+        "nombre": registro.nombre,
+        "apellido": registro.apellido,
+        "email": registro.email,
+        "indicativo_pais": registro.indicativo_pais,
+        "telefono": registro.telefono,
+        "ciudad": registro.ciudad,
+        "referido": registro.referido,
+        "fecha_registro": registro.fecha_registro,
+    }
+
+
+def buscar_duplicado(db: Session, registro: WaitlistCreate):
+    """
+    Busca un registro con el mismo email o documento.
+
+    Devuelve la fila (email, numero_documento) o None. Es una verificación
+    previa; el IntegrityError del INSERT sigue cubriendo registros simultáneos.
+    """
+    return db.query(
+        WaitlistEntry.email, WaitlistEntry.numero_documento
+    ).filter(
+        (WaitlistEntry.email == registro.email) |
+        (WaitlistEntry.numero_documento == registro.numero_documento)
+    ).first()
+
+
+def contar_waitlist(db: Session) -> int:
+    """
+    Cuenta los registros de la lista de espera.
+
+    En PostgreSQL un COUNT(*) recorre toda la tabla, así que para listas
+    grandes se usa la estimación de pg_class (mantenida por ANALYZE/autovacuum).
+    to_regclass resuelve la tabla según el search_path, así que no se confunde
+    con otra del mismo nombre en otro schema. En listas pequeñas, sin
+    estimación, o en SQLite, se hace el conteo exacto.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimado = db.execute(
+            text("SELECT reltuples::BIGINT FROM pg_class WHERE oid = to_regclass(:tabla)"),
+            {"tabla": WaitlistEntry.__tablename__}
+        ).scalar()
+        if estimado is not None and estimado >= CONTEO_ESTIMADO_MINIMO:
+            return estimado
+
+    return db.query(func.count(WaitlistEntry.id)).scalar()
+
+
 # =============================================================================
 # ENDPOINTS
 # =============================================================================
 
+# Los endpoints que consultan la BD se declaran con `def` (no `async def`):
+# FastAPI los ejecuta en su threadpool, de modo que las llamadas bloqueantes
+# de psycopg2 no detienen el event loop mientras esperan a PostgreSQL.
+
 @app.get(
     "/health",
     response_model=HealthCheck,
@@ -154,13 +354,22 @@ async def health_check():
     """
     Endpoint de salud del servidor.
     
-    No requiere autenticación.
+    No requiere autenticación. La respuesta se reutiliza durante
+    HEALTH_CACHE_TTL segundos.
     """
-    return HealthCheck(
+    global _health_cache
+    ahora = time.monotonic()
+    cacheado_en, cacheada = _health_cache
+    if cacheada is not None and ahora - cacheado_en < HEALTH_CACHE_TTL:
+        return cacheada
+    
+    respuesta = HealthCheck(
         status="healthy",
         timestamp=datetime.now(),
         version=API_VERSION
     )
+    _health_cache = (ahora, respuesta)
+    return respuesta
 
 
 @app.post(
@@ -219,11 +428,10 @@ Registra un nuevo usuario en la lista de espera.
 - PA: 5-15 caracteres alfanuméricos
     """
 )
-async def crear_registro(
+def crear_registro(
     registro: WaitlistCreate,
     request: Request,
     db: Session = Depends(get_db)
-    #api_key: str = Depends(verify_api_key)
 ):
     """Crea un nuevo registro en la lista de espera."""
     
@@ -233,9 +441,19 @@ async def crear_registro(
     if forwarded_for:
         client_ip = forwarded_for.split(",")[0].strip()
     
+    # Verificar duplicados con una sola consulta por índice (evita INSERT + ROLLBACK)
+    duplicado = buscar_duplicado(db, registro)
+    
+    if duplicado:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=MSG_EMAIL_DUPLICADO if duplicado.email == registro.email
+            else MSG_DOCUMENTO_DUPLICADO
+        )
+    
     # Crear entrada en base de datos
     db_entry = WaitlistEntry(
-        tipo_documento=TipoDocumentoModel(registro.tipo_documento.value),
+        tipo_documento=registro.tipo_documento,
         numero_documento=registro.numero_documento,
         nombre=registro.nombre,
         apellido=registro.apellido,
@@ -243,7 +461,7 @@ async def crear_registro(
         indicativo_pais=registro.indicativo_pais,
         telefono=registro.telefono,
         ciudad=registro.ciudad,
-        referido=ReferidoModel(registro.referido.value) if registro.referido else None,
+        referido=registro.referido,
         acepta_terminos=registro.acepta_terminos,
         ip_registro=client_ip
     )
@@ -253,18 +471,19 @@ async def crear_registro(
         db.commit()
         db.refresh(db_entry)
     except IntegrityError as e:
+        # Registro concurrente con los mismos datos entre la verificación y el INSERT
         db.rollback()
         error_msg = str(e.orig).lower()
         
         if "email" in error_msg:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail="Este correo electrónico ya está registrado en la lista de espera."
+                detail=MSG_EMAIL_DUPLICADO
             )
         elif "numero_documento" in error_msg:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail="Este número de documento ya está registrado en la lista de espera."
+                detail=MSG_DOCUMENTO_DUPLICADO
             )
         else:
             raise HTTPException(
@@ -272,46 +491,65 @@ async def crear_registro(
                 detail="Ya existe un registro con estos datos."
             )
     
-    # Calcular posición en la lista
-    posicion = db.query(WaitlistEntry).filter(
-        WaitlistEntry.id <= db_entry.id
-    ).count()
+    # Calcular posición en la lista a partir del primer ID (O(1), sin COUNT)
+    global _min_id
+    if _min_id is None:
+        _min_id = db.query(func.min(WaitlistEntry.id)).scalar()
+    posicion = db_entry.id - _min_id + 1
     
     return WaitlistResponse(
         success=True,
         message=f"¡Bienvenido/a {registro.nombre}! Estás en la lista de espera. "
                 f"Te contactaremos al correo {registro.email} cuando lancemos el {LAUNCH_DATE}.",
         data={
-            "id": db_entry.id,
-            "nombre": db_entry.nombre,
-            "apellido": db_entry.apellido,
-            "email": db_entry.email,
-            "posicion": posicion,
-            "fecha_registro": db_entry.fecha_registro.isoformat() if db_entry.fecha_registro else None
+            **WaitlistDetail.model_validate(db_entry).model_dump(
+                mode="json",
+                include=DATOS_REGISTRO_CREADO
+            ),
+            "posicion": posicion
         }
     )
 
 
 @app.get(
     "/api/waitlist",
-    response_model=List[WaitlistDetail],
+    response_model=None,
+    responses={200: {"model": List[WaitlistDetail]}},
     tags=["Lista de Espera"],
     summary="Listar todos los registros",
-    description="Obtiene todos los registros de la lista de espera. Uso administrativo."
+    description="""
+Obtiene los registros de la lista de espera, del más reciente al más antiguo. Uso administrativo.
+
+**Paginación por cursor:** si hay más registros, la respuesta incluye el header
+`X-Next-Cursor`; envíalo como `before_id` para obtener la siguiente página.
+
+`skip` (OFFSET) se mantiene solo por compatibilidad con clientes anteriores.
+    """
 )
-async def listar_registros(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key)
+def listar_registros(
+    before_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(100, ge=1, le=LISTADO_LIMITE_MAXIMO),
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: Session = Depends(get_db)
 ):
-    """Lista todos los registros con paginación."""
+    """Lista los registros con paginación por cursor (keyset) sobre el ID."""
+    
+    query = db.query(WaitlistEntry).options(DETALLE_COLUMNAS)
+    if before_id is not None:
+        query = query.filter(WaitlistEntry.id < before_id)
+    
+    query = query.order_by(WaitlistEntry.id.desc())
+    if skip:
+        # Paginación antigua por OFFSET: recorre y descarta `skip` filas
+        query = query.offset(skip)
     
-    registros = db.query(WaitlistEntry).order_by(
-        WaitlistEntry.fecha_registro.desc()
-    ).offset(skip).limit(limit).all()
+    registros = query.limit(limit).all()
     
-    return registros
+    response = RespuestaJSON([detalle_registro(r) for r in registros])
+    if len(registros) == limit:
+        response.headers["X-Next-Cursor"] = str(registros[-1].id)
+    
+    return response
 
 
 @app.get(
@@ -321,13 +559,12 @@ async def listar_registros(
     summary="Contar registros",
     description="Obtiene el número total de registros en la lista de espera."
 )
-async def contar_registros(
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key)
+def contar_registros(
+    db: Session = Depends(get_db)
 ):
     """Cuenta el total de registros."""
     
-    total = db.query(WaitlistEntry).count()
+    total = contar_waitlist(db)
     
     return WaitlistCount(
         total=total,
@@ -342,17 +579,18 @@ async def contar_registros(
     summary="Verificar email",
     description="Verifica si un email ya está registrado en la lista de espera."
 )
-async def verificar_email(
+def verificar_email(
     email: str,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key)
+    db: Session = Depends(get_db)
 ):
     """Verifica si un email existe en la lista."""
     
     email_lower = email.lower().strip()
-    exists = db.query(WaitlistEntry).filter(
-        WaitlistEntry.email == email_lower
-    ).first() is not None
+    exists = db.query(
+        db.query(WaitlistEntry.id).filter(
+            WaitlistEntry.email == email_lower
+        ).exists()
+    ).scalar()
     
     if exists:
         return EmailCheck(
@@ -368,21 +606,19 @@ async def verificar_email(
 
 @app.get(
     "/api/waitlist/{registro_id}",
-    response_model=WaitlistDetail,
+    response_model=None,
+    responses={200: {"model": WaitlistDetail}},
     tags=["Lista de Espera"],
     summary="Obtener registro por ID",
     description="Obtiene los detalles de un registro específico."
 )
-async def obtener_registro(
+def obtener_registro(
     registro_id: int,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key)
+    db: Session = Depends(get_db)
 ):
     """Obtiene un registro por su ID."""
     
-    registro = db.query(WaitlistEntry).filter(
-        WaitlistEntry.id == registro_id
-    ).first()
+    registro = db.get(WaitlistEntry, registro_id, options=[DETALLE_COLUMNAS])
     
     if not registro:
         raise HTTPException(
@@ -390,7 +626,7 @@ async def obtener_registro(
             detail=f"No se encontró registro con ID {registro_id}"
         )
     
-    return registro
+    return RespuestaJSON(detalle_registro(registro))
 
 
 @app.delete(
@@ -399,15 +635,17 @@ async def obtener_registro(
     summary="Eliminar registro",
     description="Elimina un registro de la lista de espera. Uso administrativo."
 )
-async def eliminar_registro(
+def eliminar_registro(
     registro_id: int,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key)
+    db: Session = Depends(get_db)
 ):
     """Elimina un registro por su ID."""
     
-    registro = db.query(WaitlistEntry).filter(
-        WaitlistEntry.id == registro_id
+    # DELETE ... RETURNING: borra y obtiene el nombre en una sola consulta
+    registro = db.execute(
+        delete(WaitlistEntry)
+        .where(WaitlistEntry.id == registro_id)
+        .returning(WaitlistEntry.nombre, WaitlistEntry.apellido)
     ).first()
     
     if not registro:
@@ -416,11 +654,10 @@ async def eliminar_registro(
             detail=f"No se encontró registro con ID {registro_id}"
         )
     
-    nombre_completo = f"{registro.nombre} {registro.apellido}"
-    
-    db.delete(registro)
     db.commit()
     
+    nombre_completo = f"{registro.nombre} {registro.apellido}"
+    
     return {
         "success": True,
         "message": f"Registro de {nombre_completo} eliminado correctamente",
@@ -438,7 +675,7 @@ async def eliminar_registro(
     summary="Política de tratamiento de datos",
     description="Texto de la política de tratamiento de datos según Ley 1581 de 2012."
 )
-async def politica_datos(api_key: str = Depends(verify_api_key)):
+async def politica_datos():
     """Retorna el texto de la política de datos."""
     
     return {
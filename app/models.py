@@ -4,24 +4,7 @@ Modelos SQLAlchemy para la lista de espera.
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum
 from sqlalchemy.sql import func
 from app.database import Base
-import enum
-
-
-class TipoDocumento(str, enum.Enum):
-    """Tipos de documento de identidad en Colombia."""
-    CC = "CC"   # Cédula de Ciudadanía
-    CE = "CE"   # Cédula de Extranjería
-    TI = "TI"   # Tarjeta de Identidad
-    PA = "PA"   # Pasaporte
-
-
-class Referido(str, enum.Enum):
-    """Cómo conoció el usuario el devocional."""
-    REDES_SOCIALES = "redes_sociales"
-    AMIGO = "amigo"
-    PARROQUIA = "parroquia"
-    COMUNIDAD = "comunidad"
-    OTRO = "otro"
+from app.enums import TipoDocumento, Referido
 
 
 class WaitlistEntry(Base):
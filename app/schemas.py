@@ -9,25 +9,25 @@ Incluye validaciones específicas para Colombia:
 from pydantic import BaseModel, Field, field_validator, model_validator, EmailStr
 from typing import Optional
 from datetime import datetime
-from enum import Enum
 import re
+import string
+import sys
 
+from app.enums import TipoDocumento, Referido
 
-class TipoDocumento(str, Enum):
-    """Tipos de documento de identidad válidos en Colombia."""
-    CC = "CC"   # Cédula de Ciudadanía
-    CE = "CE"   # Cédula de Extranjería  
-    TI = "TI"   # Tarjeta de Identidad
-    PA = "PA"   # Pasaporte
 
+# Todos los espacios Unicode (p. ej. NBSP), no solo los ASCII de string.whitespace.
+# Se calcula una vez al importar el módulo.
+_ESPACIOS = "".join(c for c in map(chr, range(sys.maxunicode + 1)) if c.isspace())
 
-class Referido(str, Enum):
-    """Opciones de cómo conoció el devocional."""
-    REDES_SOCIALES = "redes_sociales"
-    AMIGO = "amigo"
-    PARROQUIA = "parroquia"
-    COMUNIDAD = "comunidad"
-    OTRO = "otro"
+# Caracteres permitidos en nombre/apellido: letras (con acentos), espacios y guiones
+_NAME_CHARS = frozenset(string.ascii_letters + "áéíóúÁÉÍÓÚñÑüÜ" + _ESPACIOS + "-'")
+
+# Tablas de str.translate para limpiar separadores en una sola pasada
+_DOC_STRIP_TABLE = str.maketrans('', '', _ESPACIOS + '-.')
+_PHONE_STRIP_TABLE = str.maketrans('', '', _ESPACIOS + '-().')
+
+_INDICATIVO_RE = re.compile(r'^\+\d{1,4}$')
 
 
 class WaitlistCreate(BaseModel):
@@ -117,7 +117,7 @@ class WaitlistCreate(BaseModel):
             raise ValueError(f'El {campo} no puede estar vacío')
         
         # Permite letras (incluyendo acentos), espacios y guiones
-        if not re.match(r"^[a-zA-ZáéíóúÁÉÍÓÚñÑüÜ\s\-']+$", v):
+        if not _NAME_CHARS.issuperset(v):
             campo = info.field_name
             raise ValueError(f'El {campo} solo puede contener letras, espacios y guiones')
         
@@ -129,7 +129,7 @@ class WaitlistCreate(BaseModel):
     def validar_numero_documento(cls, v: str) -> str:
         """Valida formato básico del número de documento."""
         # Remover espacios y guiones
-        v = re.sub(r'[\s\-\.]', '', v)
+        v = v.translate(_DOC_STRIP_TABLE)
         
         if not v:
             raise ValueError('El número de documento no puede estar vacío')
@@ -183,7 +183,7 @@ class WaitlistCreate(BaseModel):
         Debe tener entre 7 y 15 dígitos.
         """
         # Remover espacios, guiones y paréntesis
-        v = re.sub(r'[\s\-\(\)\.]', '', v)
+        v = v.translate(_PHONE_STRIP_TABLE)
         
         if not v.isdigit():
             raise ValueError('El teléfono debe contener solo números')
@@ -199,7 +199,7 @@ class WaitlistCreate(BaseModel):
         """Valida el indicativo de país."""
         if not v.startswith('+'):
             v = '+' + v
-        if not re.match(r'^\+\d{1,4}$', v):
+        if not _INDICATIVO_RE.match(v):
             raise ValueError('Indicativo inválido (ej: +57, +1, +34)')
         return v
 
@@ -5,73 +5,176 @@ Nota: Los tests usan SQLite en memoria para velocidad y portabilidad.
 La aplicación en producción usa PostgreSQL.
 """
 import os
+from types import MappingProxyType
 # IMPORTANTE: Configurar variables ANTES de importar la app
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["ADMIN_USERNAME"] = "admin"
 os.environ["ADMIN_PASSWORD"] = "admin123"
 
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.database import Base, get_db
-from app.main import app, API_KEY
+from app.enums import TipoDocumento, Referido
+from app.main import app
+from app.models import WaitlistEntry
 
-# Base de datos SQLite en memoria para tests (no requiere PostgreSQL)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Base de datos SQLite en memoria para tests (no requiere PostgreSQL).
+# Con cache=shared todas las conexiones del pool ven la misma base en memoria,
+# sin depender de StaticPool (una única conexión para todo el proceso).
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:memdb_test?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    connect_args={"check_same_thread": False, "uri": True},
+    poolclass=QueuePool,
 )
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# pysqlite maneja mal BEGIN/SAVEPOINT por su cuenta: se desactiva su control
+# de transacciones y SQLAlchemy emite el BEGIN (receta de la documentación).
+@event.listens_for(engine, "connect")
+def _desactivar_begin_pysqlite(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
 
-def override_get_db():
-    """Override de la dependencia de base de datos para tests."""
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
+@event.listens_for(engine, "begin")
+def _emitir_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Las sesiones se unen a la transacción externa del test mediante SAVEPOINT:
+# sus commit/rollback solo afectan al savepoint y el test lo deshace todo.
+TestingSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    join_transaction_mode="create_savepoint"
+)
 
-# Override de la dependencia
-app.dependency_overrides[get_db] = override_get_db
+# INSERT de Core construido una vez para registro_factory (sin unit of work del ORM)
+_waitlist_insert = WaitlistEntry.__table__.insert().returning(*WaitlistEntry.__table__.c)
 
 
-@pytest.fixture(scope="function")
-def db_session():
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
     """
-    Fixture que proporciona una sesión de base de datos limpia para cada test.
+    Crea las tablas una sola vez por sesión de tests.
+
+    Con pytest-xdist cada worker es un proceso con su propio engine y su
+    propia base en memoria, así que no hay colisiones entre workers.
+
+    No hay drop_all al final: la base en memoria desaparece con el proceso
+    y cada test ya limpia sus datos con el rollback de db_session.
     """
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+
+
+@pytest.fixture(scope="session")
+def connection(_schema):
+    """
+    Conexión compartida por todos los tests.
+    """
+    conn = engine.connect()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def db_session(connection):
+    """
+    Fixture que proporciona una sesión de base de datos limpia para cada test.
+
+    Cada test corre dentro de una transacción que se revierte al terminar,
+    en lugar de crear y borrar las tablas. La app recibe esta misma sesión
+    (override de get_db), así que test y endpoints comparten transacción.
+    Es autouse para aislar también los tests que solo usan el cliente.
+    """
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection)
+    
+    def override_get_db():
+        """Override de la dependencia de base de datos para tests."""
+        yield db
+    
+    app.dependency_overrides[get_db] = override_get_db
     yield db
+    app.dependency_overrides.pop(get_db, None)
     db.close()
-    Base.metadata.drop_all(bind=engine)
+    transaction.rollback()
 
 
-@pytest.fixture(scope="function")
-def client(db_session):
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
     """
-    Fixture que proporciona un cliente de test con base de datos limpia.
+    Fixture que proporciona un cliente HTTP asíncrono compartido por toda la sesión.
+
+    Llama a la app directamente por ASGI (sin el puente síncrono de TestClient).
+    El lifespan de la app se ejecuta una sola vez; el aislamiento entre tests
+    lo da la transacción de db_session.
     """
-    Base.metadata.create_all(bind=engine)
-    yield TestClient(app)
-    Base.metadata.drop_all(bind=engine)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as c:
+            yield c
 
 
-@pytest.fixture
-def api_headers():
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def admin_api_key(client):
+    """
+    API Key obtenida con el login de administrador, una sola vez por sesión.
+    """
+    response = await client.post(
+        "/api/admin/login",
+        json={
+            "username": os.environ["ADMIN_USERNAME"],
+            "password": os.environ["ADMIN_PASSWORD"]
+        }
+    )
+    return response.json()["api_key"]
+
+
+@pytest.fixture(scope="session")
+def api_headers(admin_api_key):
     """
     Fixture que proporciona headers con API Key válida.
+
+    Se construye una vez por sesión y es de solo lectura para que ningún
+    test pueda modificarla.
     """
-    return {"X-API-Key": API_KEY}
+    return MappingProxyType({"X-API-Key": admin_api_key})
+
+
+# Plantillas de datos de registro (solo valores inmutables: basta una copia superficial)
+_registro_valido_template = {
+    "tipo_documento": "CC",
+    "numero_documento": "1234567890",
+    "nombre": "María José",
+    "apellido": "García López",
+    "email": "maria@ejemplo.com",
+    "indicativo_pais": "+57",
+    "telefono": "3001234567",
+    "ciudad": "Barranquilla",
+    "referido": "redes_sociales",
+    "acepta_terminos": True
+}
+
+_registro_minimo_template = {
+    "tipo_documento": "CC",
+    "numero_documento": "9876543210",
+    "nombre": "Juan",
+    "apellido": "Pérez",
+    "email": "juan@ejemplo.com",
+    "indicativo_pais": "+57",
+    "telefono": "3109876543",
+    "acepta_terminos": True
+}
 
 
 @pytest.fixture
@@ -79,18 +182,7 @@ def registro_valido():
     """
     Fixture que proporciona datos de un registro válido.
     """
-    return {
-        "tipo_documento": "CC",
-        "numero_documento": "1234567890",
-        "nombre": "María José",
-        "apellido": "García López",
-        "email": "maria@ejemplo.com",
-        "indicativo_pais": "+57",
-        "telefono": "3001234567",
-        "ciudad": "Barranquilla",
-        "referido": "redes_sociales",
-        "acepta_terminos": True
-    }
+    return dict(_registro_valido_template)
 
 
 @pytest.fixture
@@ -98,13 +190,24 @@ def registro_minimo():
     """
     Fixture con datos mínimos requeridos (sin opcionales).
     """
-    return {
-        "tipo_documento": "CC",
-        "numero_documento": "9876543210",
-        "nombre": "Juan",
-        "apellido": "Pérez",
-        "email": "juan@ejemplo.com",
-        "indicativo_pais": "+57",
-        "telefono": "3109876543",
-        "acepta_terminos": True
-    }
+    return dict(_registro_minimo_template)
+
+
+@pytest.fixture
+def registro_factory(db_session):
+    """
+    Fixture que inserta registros directamente en la BD, sin pasar por la API.
+
+    Usa los datos del registro válido, sobrescritos con los kwargs recibidos,
+    y devuelve la fila insertada (con id y fecha_registro).
+    Pensada para preparar datos en tests que no prueban el POST.
+    """
+    def crear(**campos):
+        datos = {**_registro_valido_template, **campos}
+        datos["tipo_documento"] = TipoDocumento(datos["tipo_documento"])
+        if datos.get("referido"):
+            datos["referido"] = Referido(datos["referido"])
+        
+        return db_session.execute(_waitlist_insert, datos).one()
+    
+    return crear
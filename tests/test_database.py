@@ -0,0 +1,113 @@
+"""
+Tests de la configuración del pool de conexiones.
+
+Ejecutar con: pytest tests/ -v
+"""
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import QueuePool
+
+import app.database
+from app.database import POOL_PING_IDLE, _verificar_conexion_inactiva, registrar_ping_perezoso
+
+
+class CursorContado(sqlite3.Cursor):
+    """Cursor que cuenta los pings y puede simular una conexión caída."""
+    
+    def execute(self, sql, *args):
+        if sql == "SELECT 1":
+            self.connection.pings += 1
+            if self.connection.caida:
+                raise sqlite3.OperationalError("server closed the connection unexpectedly")
+        return super().execute(sql, *args)
+
+
+class ConexionContada(sqlite3.Connection):
+    """Conexión SQLite que usa CursorContado."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pings = 0
+        self.caida = False
+    
+    def cursor(self, factory=CursorContado):
+        return super().cursor(factory)
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj monotónico controlado por el test."""
+    ahora = [1000.0]
+    monkeypatch.setattr(app.database, "time", SimpleNamespace(monotonic=lambda: ahora[0]))
+    return ahora
+
+
+@pytest.fixture
+def engine_con_ping():
+    """Engine SQLite con QueuePool de una conexión y el ping perezoso."""
+    engine = create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(":memory:", factory=ConexionContada, check_same_thread=False),
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    registrar_ping_perezoso(engine)
+    yield engine
+    engine.dispose()
+
+
+def _conexion_dbapi(engine):
+    """Saca una conexión del pool y la devuelve, retornando la conexión DBAPI usada."""
+    with engine.connect() as conn:
+        return conn.connection.dbapi_connection
+
+
+class TestPingPerezoso:
+    """Tests del ping a conexiones inactivas del pool."""
+    
+    def test_sin_ping_dentro_del_umbral(self, engine_con_ping, reloj):
+        """Una conexión usada hace menos de POOL_PING_IDLE segundos no se verifica."""
+        primera = _conexion_dbapi(engine_con_ping)
+        
+        reloj[0] += POOL_PING_IDLE - 1
+        segunda = _conexion_dbapi(engine_con_ping)
+        
+        assert segunda is primera
+        assert primera.pings == 0
+    
+    def test_ping_tras_inactividad(self, engine_con_ping, reloj):
+        """Una conexión inactiva más de POOL_PING_IDLE segundos se verifica con SELECT 1."""
+        primera = _conexion_dbapi(engine_con_ping)
+        
+        reloj[0] += POOL_PING_IDLE + 1
+        segunda = _conexion_dbapi(engine_con_ping)
+        
+        assert segunda is primera
+        assert primera.pings == 1
+    
+    def test_ping_fallido_reemplaza_la_conexion(self, engine_con_ping, reloj):
+        """Si el ping falla (DisconnectionError), el pool abre una conexión nueva."""
+        primera = _conexion_dbapi(engine_con_ping)
+        primera.caida = True
+        
+        reloj[0] += POOL_PING_IDLE + 1
+        segunda = _conexion_dbapi(engine_con_ping)
+        
+        assert primera.pings == 1
+        assert segunda is not primera
+        assert segunda.caida is False
+    
+    def test_ping_fallido_lanza_disconnection_error(self, reloj):
+        """El listener convierte el fallo del ping en DisconnectionError."""
+        conexion = sqlite3.connect(":memory:", factory=ConexionContada)
+        conexion.caida = True
+        registro = SimpleNamespace(info={"ultimo_uso": reloj[0] - POOL_PING_IDLE - 1})
+        
+        with pytest.raises(DisconnectionError):
+            _verificar_conexion_inactiva(conexion, registro, None)
+        conexion.close()
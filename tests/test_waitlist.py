@@ -3,57 +3,169 @@ Tests para la API de Lista de Espera.
 
 Ejecutar con: pytest tests/ -v
 """
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
 import pytest
-from fastapi import status
+
+# Códigos HTTP esperados (enteros, sin buscar atributos en fastapi.status)
+HTTP_200_OK = 200
+HTTP_201_CREATED = 201
+HTTP_307_TEMPORARY_REDIRECT = 307
+HTTP_401_UNAUTHORIZED = 401
+HTTP_404_NOT_FOUND = 404
+HTTP_409_CONFLICT = 409
+HTTP_422_UNPROCESSABLE_ENTITY = 422
+
+# Todos los tests comparten el event loop de la sesión (igual que el cliente)
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+# Para tests síncronos (sin cliente HTTP): silencia el aviso de pytest-asyncio
+# por heredar la marca asyncio de pytestmark
+sincrono = pytest.mark.filterwarnings(
+    "ignore:The test .* is marked with '@pytest.mark.asyncio' but it is not an async function"
+)
 
 
 class TestHealthCheck:
     """Tests para el endpoint de salud."""
     
-    def test_health_check_sin_api_key(self, client):
+    async def test_health_check_sin_api_key(self, client):
         """El health check no requiere API key."""
-        response = client.get("/health")
-        assert response.status_code == status.HTTP_200_OK
+        response = await client.get("/health")
+        assert response.status_code == HTTP_200_OK
         data = response.json()
         assert data["status"] == "healthy"
         assert "timestamp" in data
         assert "version" in data
+    
+    async def test_health_check_cacheado(self, client, monkeypatch):
+        """Dos consultas dentro de HEALTH_CACHE_TTL devuelven la misma respuesta."""
+        import app.main
+        
+        monkeypatch.setattr(app.main, "_health_cache", (0.0, None))
+        monkeypatch.setattr(app.main, "HEALTH_CACHE_TTL", 60.0)
+        
+        primera = await client.get("/health")
+        segunda = await client.get("/health")
+        assert primera.json()["timestamp"] == segunda.json()["timestamp"]
+    
+    @sincrono
+    @pytest.mark.parametrize("entorno,expuesto", [
+        ("development", True),
+        ("prod", False),
+    ])
+    def test_openapi_segun_entorno(self, entorno, expuesto):
+        """Con ENV=prod no se exponen el esquema OpenAPI ni la documentación."""
+        from fastapi import FastAPI
+        from app.main import openapi_url_segun_entorno
+        
+        rutas = {r.path for r in FastAPI(openapi_url=openapi_url_segun_entorno(entorno)).routes}
+        assert ("/openapi.json" in rutas) is expuesto
+        assert ("/docs" in rutas) is expuesto
 
 
 class TestAPIKeySecurity:
     """Tests de seguridad con API Key."""
     
-    def test_endpoint_sin_api_key_retorna_422(self, client):
+    async def test_endpoint_sin_api_key_retorna_422(self, client):
         """Endpoints protegidos sin API key retornan 422."""
-        response = client.get("/api/waitlist")
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = await client.get("/api/waitlist")
+        assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
     
-    def test_endpoint_con_api_key_invalida_retorna_401(self, client):
+    async def test_endpoint_con_api_key_invalida_retorna_401(self, client):
         """API key inválida retorna 401."""
-        response = client.get(
+        response = await client.get(
             "/api/waitlist",
             headers={"X-API-Key": "clave-invalida"}
         )
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.status_code == HTTP_401_UNAUTHORIZED
         assert "API Key inválida" in response.json()["error"]
     
-    def test_endpoint_con_api_key_valida_funciona(self, client, api_headers):
+    async def test_endpoint_con_api_key_valida_funciona(self, client, api_headers):
         """API key válida permite acceso."""
-        response = client.get("/api/waitlist", headers=api_headers)
-        assert response.status_code == status.HTTP_200_OK
+        response = await client.get("/api/waitlist", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
+    
+    async def test_registro_no_requiere_api_key(self, client, registro_valido):
+        """El registro en la lista de espera es público."""
+        response = await client.post("/api/waitlist", json=registro_valido)
+        assert response.status_code == HTTP_201_CREATED
+    
+    @pytest.mark.parametrize("ruta", [
+        "/health",
+        "/api/legal/politica-datos",
+        "/docs",
+        "/openapi.json",
+    ])
+    async def test_rutas_publicas_sin_api_key(self, client, ruta):
+        """Las rutas públicas responden sin API key."""
+        response = await client.get(ruta)
+        assert response.status_code == HTTP_200_OK
+    
+    async def test_ruta_inexistente_retorna_404(self, client):
+        """Una ruta desconocida responde 404 aunque no lleve API key."""
+        response = await client.get("/nope")
+        assert response.status_code == HTTP_404_NOT_FOUND
+    
+    async def test_registro_con_barra_final_redirige(self, client, registro_valido):
+        """POST /api/waitlist/ sin API key redirige al registro público."""
+        response = await client.post("/api/waitlist/", json=registro_valido)
+        assert response.status_code == HTTP_307_TEMPORARY_REDIRECT
+        assert response.headers["location"].endswith("/api/waitlist")
+    
+    @pytest.mark.parametrize("metodo,ruta", [
+        ("GET", "/api/waitlist/count"),
+        ("GET", "/api/waitlist/1"),
+        ("DELETE", "/api/waitlist/1"),
+    ])
+    async def test_rutas_protegidas_sin_api_key(self, client, metodo, ruta):
+        """Solo el POST de registro es público dentro de /api/waitlist."""
+        response = await client.request(metodo, ruta)
+        assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["success"] is False
+
+
+class TestCORS:
+    """Tests de configuración CORS."""
+    
+    @pytest.mark.parametrize("origen", [
+        "http://localhost:3000",
+        "https://devocionales-taupe.vercel.app",
+    ])
+    async def test_origen_recibe_header_cors(self, client, origen):
+        """Cualquier origen recibe el header CORS (política "*")."""
+        response = await client.get("/health", headers={"Origin": origen})
+        assert response.headers["access-control-allow-origin"] == "*"
+    
+    @sincrono
+    @pytest.mark.parametrize("en_proxy,registrado", [
+        (False, True),
+        (True, False),
+    ], ids=["sin_proxy", "cors_en_proxy"])
+    def test_registrar_cors(self, en_proxy, registrado):
+        """Con CORS_EN_PROXY la app no registra CORSMiddleware."""
+        from fastapi import FastAPI
+        from fastapi.middleware.cors import CORSMiddleware
+        from app.main import registrar_cors
+        
+        app = FastAPI()
+        registrar_cors(app, en_proxy)
+        assert any(m.cls is CORSMiddleware for m in app.user_middleware) is registrado
 
 
 class TestRegistroExitoso:
     """Tests para registro exitoso en lista de espera."""
     
-    def test_registro_completo_exitoso(self, client, api_headers, registro_valido):
+    async def test_registro_completo_exitoso(self, client, api_headers, registro_valido):
         """Registro con todos los campos funciona."""
-        response = client.post(
+        response = await client.post(
             "/api/waitlist",
             json=registro_valido,
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_201_CREATED
+        assert response.status_code == HTTP_201_CREATED
         data = response.json()
         assert data["success"] is True
         assert "María José" in data["message"]
@@ -61,38 +173,56 @@ class TestRegistroExitoso:
         assert data["data"]["apellido"] == "García López"
         assert data["data"]["posicion"] == 1
     
-    def test_registro_minimo_exitoso(self, client, api_headers, registro_minimo):
+    async def test_posicion_con_registros_previos(
+        self, client, api_headers, registro_minimo, registro_valido, registro_factory, monkeypatch
+    ):
+        """Sin ID inicial cacheado, la posición parte del primer ID en la BD."""
+        import app.main
+        
+        # Simula un worker que arrancó con la lista vacía mientras otro ya registró
+        monkeypatch.setattr(app.main, "_min_id", None)
+        registro_factory(**registro_minimo)
+        
+        response = await client.post(
+            "/api/waitlist",
+            json=registro_valido,
+            headers=api_headers
+        )
+        assert response.status_code == HTTP_201_CREATED
+        assert response.json()["data"]["posicion"] == 2
+    
+    async def test_registro_minimo_exitoso(self, client, api_headers, registro_minimo):
         """Registro con campos mínimos funciona."""
-        response = client.post(
+        response = await client.post(
             "/api/waitlist",
             json=registro_minimo,
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_201_CREATED
+        assert response.status_code == HTTP_201_CREATED
         data = response.json()
         assert data["success"] is True
     
-    def test_email_se_normaliza_a_minusculas(self, client, api_headers, registro_valido):
+    async def test_email_se_normaliza_a_minusculas(self, client, api_headers, registro_valido):
         """Email se guarda en minúsculas."""
         registro_valido["email"] = "MARIA@EJEMPLO.COM"
-        response = client.post(
+        response = await client.post(
             "/api/waitlist",
             json=registro_valido,
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_201_CREATED
+        assert response.status_code == HTTP_201_CREATED
         assert response.json()["data"]["email"] == "maria@ejemplo.com"
     
-    def test_nombre_se_capitaliza(self, client, api_headers, registro_valido):
+    async def test_nombre_se_capitaliza(self, client, api_headers, registro_valido):
         """Nombre se capitaliza correctamente."""
         registro_valido["nombre"] = "maría josé"
         registro_valido["apellido"] = "garcía lópez"
-        response = client.post(
+        response = await client.post(
             "/api/waitlist",
             json=registro_valido,
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_201_CREATED
+        assert response.status_code == HTTP_201_CREATED
         data = response.json()["data"]
         assert data["nombre"] == "María José"
         assert data["apellido"] == "García López"
@@ -101,287 +231,400 @@ class TestRegistroExitoso:
 class TestValidacionDocumentos:
     """Tests de validación de documentos de identidad."""
     
-    def test_cedula_ciudadania_valida(self, client, api_headers, registro_valido):
-        """CC con 8 dígitos es válida."""
-        registro_valido["tipo_documento"] = "CC"
-        registro_valido["numero_documento"] = "12345678"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
-    
-    def test_cedula_ciudadania_muy_corta(self, client, api_headers, registro_valido):
-        """CC con menos de 6 dígitos es inválida."""
-        registro_valido["tipo_documento"] = "CC"
-        registro_valido["numero_documento"] = "12345"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_cedula_ciudadania_con_letras(self, client, api_headers, registro_valido):
-        """CC no puede tener letras."""
-        registro_valido["tipo_documento"] = "CC"
-        registro_valido["numero_documento"] = "1234567A"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_cedula_extranjeria_valida(self, client, api_headers, registro_valido):
-        """CE alfanumérica de 6-7 caracteres es válida."""
-        registro_valido["tipo_documento"] = "CE"
-        registro_valido["numero_documento"] = "ABC1234"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
-    
-    def test_tarjeta_identidad_valida(self, client, api_headers, registro_valido):
-        """TI de 10-11 dígitos es válida."""
-        registro_valido["tipo_documento"] = "TI"
-        registro_valido["numero_documento"] = "10012345678"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
-    
-    def test_pasaporte_valido(self, client, api_headers, registro_valido):
-        """Pasaporte alfanumérico de 5-15 caracteres es válido."""
-        registro_valido["tipo_documento"] = "PA"
-        registro_valido["numero_documento"] = "AB1234567"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
+    @pytest.mark.parametrize("cambios,esperado", [
+        # CC con 8 dígitos es válida
+        ({"tipo_documento": "CC", "numero_documento": "12345678"}, HTTP_201_CREATED),
+        # CC con menos de 6 dígitos es inválida
+        ({"tipo_documento": "CC", "numero_documento": "12345"}, HTTP_422_UNPROCESSABLE_ENTITY),
+        # CC no puede tener letras
+        ({"tipo_documento": "CC", "numero_documento": "1234567A"}, HTTP_422_UNPROCESSABLE_ENTITY),
+        # CE alfanumérica de 6-7 caracteres es válida
+        ({"tipo_documento": "CE", "numero_documento": "ABC1234"}, HTTP_201_CREATED),
+        # TI de 10-11 dígitos es válida
+        ({"tipo_documento": "TI", "numero_documento": "10012345678"}, HTTP_201_CREATED),
+        # Pasaporte alfanumérico de 5-15 caracteres es válido
+        ({"tipo_documento": "PA", "numero_documento": "AB1234567"}, HTTP_201_CREATED),
+        # Espacio no separable (NBSP) se limpia como cualquier espacio
+        ({"tipo_documento": "CC", "numero_documento": "1234\xa0567890"}, HTTP_201_CREATED),
+    ], ids=[
+        "cedula_ciudadania_valida",
+        "cedula_ciudadania_muy_corta",
+        "cedula_ciudadania_con_letras",
+        "cedula_extranjeria_valida",
+        "tarjeta_identidad_valida",
+        "pasaporte_valido",
+        "cedula_con_nbsp",
+    ])
+    async def test_documento(self, client, api_headers, registro_valido, cambios, esperado):
+        """El documento se valida según su tipo."""
+        registro_valido.update(cambios)
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        assert response.status_code == esperado
 
 
 class TestValidacionTelefono:
     """Tests de validación de teléfono."""
     
-    def test_telefono_valido(self, client, api_headers, registro_valido):
-        """Teléfono de 10 dígitos es válido."""
-        registro_valido["telefono"] = "3001234567"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
-    
-    def test_telefono_muy_corto(self, client, api_headers, registro_valido):
-        """Teléfono de menos de 7 dígitos es inválido."""
-        registro_valido["telefono"] = "123456"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_telefono_internacional(self, client, api_headers, registro_valido):
-        """Teléfono con indicativo diferente es válido."""
-        registro_valido["indicativo_pais"] = "+1"
-        registro_valido["telefono"] = "2025551234"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
-    
-    def test_indicativo_invalido(self, client, api_headers, registro_valido):
-        """Indicativo inválido retorna error."""
-        registro_valido["indicativo_pais"] = "abc"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_telefono_con_espacios(self, client, api_headers, registro_valido):
-        """Teléfono con espacios se normaliza."""
-        registro_valido["telefono"] = "300 123 4567"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
+    @pytest.mark.parametrize("cambios,esperado", [
+        # Teléfono de 10 dígitos es válido
+        ({"telefono": "3001234567"}, HTTP_201_CREATED),
+        # Teléfono de menos de 7 dígitos es inválido
+        ({"telefono": "123456"}, HTTP_422_UNPROCESSABLE_ENTITY),
+        # Teléfono con indicativo diferente es válido
+        ({"indicativo_pais": "+1", "telefono": "2025551234"}, HTTP_201_CREATED),
+        # Indicativo inválido retorna error
+        ({"indicativo_pais": "abc"}, HTTP_422_UNPROCESSABLE_ENTITY),
+        # Teléfono con espacios se normaliza
+        ({"telefono": "300 123 4567"}, HTTP_201_CREATED),
+        # Teléfono con espacios no separables (NBSP) se normaliza
+        ({"telefono": "300\xa0123\xa04567"}, HTTP_201_CREATED),
+    ], ids=[
+        "telefono_valido",
+        "telefono_muy_corto",
+        "telefono_internacional",
+        "indicativo_invalido",
+        "telefono_con_espacios",
+        "telefono_con_nbsp",
+    ])
+    async def test_telefono(self, client, api_headers, registro_valido, cambios, esperado):
+        """El teléfono y el indicativo se validan y normalizan."""
+        registro_valido.update(cambios)
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        assert response.status_code == esperado
 
 
 class TestValidacionEmail:
     """Tests de validación de email."""
     
-    def test_email_invalido(self, client, api_headers, registro_valido):
-        """Email mal formateado es rechazado."""
-        registro_valido["email"] = "correo-invalido"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_email_sin_dominio(self, client, api_headers, registro_valido):
-        """Email sin dominio es rechazado."""
-        registro_valido["email"] = "correo@"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    @pytest.mark.parametrize("email", [
+        "correo-invalido",  # Email mal formateado
+        "correo@",          # Email sin dominio
+    ], ids=["email_invalido", "email_sin_dominio"])
+    async def test_email_rechazado(self, client, api_headers, registro_valido, email):
+        """Email inválido es rechazado."""
+        registro_valido["email"] = email
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
 
 
 class TestValidacionNombre:
     """Tests de validación de nombre y apellido."""
     
-    def test_nombre_muy_corto(self, client, api_headers, registro_valido):
-        """Nombre de 1 carácter es rechazado."""
-        registro_valido["nombre"] = "A"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_nombre_con_numeros(self, client, api_headers, registro_valido):
-        """Nombre con números es rechazado."""
-        registro_valido["nombre"] = "María123"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    
-    def test_nombre_con_acentos(self, client, api_headers, registro_valido):
-        """Nombre con acentos es aceptado."""
-        registro_valido["nombre"] = "José María"
-        registro_valido["apellido"] = "González Muñoz"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_201_CREATED
+    @pytest.mark.parametrize("cambios,esperado", [
+        # Nombre de 1 carácter es rechazado
+        ({"nombre": "A"}, HTTP_422_UNPROCESSABLE_ENTITY),
+        # Nombre con números es rechazado
+        ({"nombre": "María123"}, HTTP_422_UNPROCESSABLE_ENTITY),
+        # Nombre con acentos es aceptado
+        ({"nombre": "José María", "apellido": "González Muñoz"}, HTTP_201_CREATED),
+        # Nombre compuesto separado con NBSP es aceptado
+        ({"nombre": "María\xa0José"}, HTTP_201_CREATED),
+    ], ids=[
+        "nombre_muy_corto",
+        "nombre_con_numeros",
+        "nombre_con_acentos",
+        "nombre_con_nbsp",
+    ])
+    async def test_nombre(self, client, api_headers, registro_valido, cambios, esperado):
+        """Nombre y apellido solo admiten letras, espacios y guiones."""
+        registro_valido.update(cambios)
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        assert response.status_code == esperado
 
 
 class TestValidacionTerminos:
     """Tests de aceptación de términos (Ley 1581)."""
     
-    def test_sin_aceptar_terminos(self, client, api_headers, registro_valido):
+    async def test_sin_aceptar_terminos(self, client, api_headers, registro_valido):
         """No aceptar términos es rechazado."""
         registro_valido["acepta_terminos"] = False
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
         assert "Ley 1581" in str(response.json())
 
 
 class TestDuplicados:
     """Tests de manejo de duplicados."""
     
-    def test_email_duplicado(self, client, api_headers, registro_valido):
+    async def test_email_duplicado(self, client, api_headers, registro_valido, registro_factory):
         """Email duplicado retorna 409."""
         # Primer registro
-        client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        registro_factory()
         
         # Segundo registro con mismo email
         registro_valido["numero_documento"] = "9999999999"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
         
-        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.status_code == HTTP_409_CONFLICT
         assert "correo" in response.json()["error"].lower()
     
-    def test_documento_duplicado(self, client, api_headers, registro_valido):
+    async def test_documento_duplicado(self, client, api_headers, registro_valido, registro_factory):
         """Documento duplicado retorna 409."""
         # Primer registro
-        client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        registro_factory()
         
         # Segundo registro con mismo documento
         registro_valido["email"] = "otro@ejemplo.com"
-        response = client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
         
-        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.status_code == HTTP_409_CONFLICT
         assert "documento" in response.json()["error"].lower()
+    
+    @pytest.mark.parametrize("cambios,mensaje", [
+        ({"numero_documento": "9999999999"}, "correo"),
+        ({"email": "otro@ejemplo.com"}, "documento"),
+    ], ids=["email_concurrente", "documento_concurrente"])
+    async def test_duplicado_concurrente(
+        self, client, api_headers, registro_valido, registro_factory, monkeypatch, cambios, mensaje
+    ):
+        """Si otro registro entra tras la verificación previa, el IntegrityError retorna 409."""
+        import app.main
+        
+        # La verificación previa no ve el registro (llegó entre el SELECT y el INSERT)
+        monkeypatch.setattr(app.main, "buscar_duplicado", lambda db, registro: None)
+        registro_factory()
+        
+        registro_valido.update(cambios)
+        response = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        
+        assert response.status_code == HTTP_409_CONFLICT
+        assert mensaje in response.json()["error"].lower()
 
 
 class TestListarRegistros:
     """Tests para listar registros."""
     
-    def test_listar_vacio(self, client, api_headers):
+    async def test_listar_vacio(self, client, api_headers):
         """Lista vacía retorna array vacío."""
-        response = client.get("/api/waitlist", headers=api_headers)
-        assert response.status_code == status.HTTP_200_OK
+        response = await client.get("/api/waitlist", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
         assert response.json() == []
     
-    def test_listar_con_registros(self, client, api_headers, registro_valido):
+    async def test_listar_con_registros(self, client, api_headers, registro_factory):
         """Lista con registros retorna datos."""
-        client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        registro_factory()
         
-        response = client.get("/api/waitlist", headers=api_headers)
-        assert response.status_code == status.HTTP_200_OK
+        response = await client.get("/api/waitlist", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
         data = response.json()
         assert len(data) == 1
         assert data[0]["nombre"] == "María José"
+    
+    async def test_listar_paginado_por_cursor(self, client, api_headers, registro_minimo, registro_factory):
+        """La paginación por cursor devuelve la siguiente página con before_id."""
+        registro_factory()
+        registro_factory(**registro_minimo)
+        
+        response = await client.get("/api/waitlist?limit=1", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
+        assert response.json()[0]["nombre"] == "Juan"
+        cursor = response.headers["X-Next-Cursor"]
+        
+        response = await client.get(
+            f"/api/waitlist?limit=1&before_id={cursor}",
+            headers=api_headers
+        )
+        assert response.status_code == HTTP_200_OK
+        assert response.json()[0]["nombre"] == "María José"
+    
+    async def test_listar_con_skip_deprecado(self, client, api_headers, registro_minimo, registro_factory):
+        """skip (OFFSET) sigue funcionando para clientes anteriores al cursor."""
+        registro_factory()
+        registro_factory(**registro_minimo)
+        
+        response = await client.get("/api/waitlist?skip=1", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
+        assert [r["nombre"] for r in response.json()] == ["María José"]
+    
+    @pytest.mark.parametrize("params", [
+        "skip=-1",
+        "limit=0",
+        "limit=-1",
+        "limit=501",
+        "before_id=0",
+    ], ids=["skip_negativo", "limit_cero", "limit_negativo", "limit_excede_maximo", "before_id_cero"])
+    async def test_listar_parametros_fuera_de_rango(self, client, api_headers, params):
+        """limit y before_id fuera de rango son rechazados."""
+        response = await client.get(f"/api/waitlist?{params}", headers=api_headers)
+        assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+    
+    async def test_cursor_expuesto_por_cors(self, client, api_headers, registro_factory):
+        """El navegador puede leer X-Next-Cursor en peticiones cross-origin."""
+        registro_factory()
+        
+        response = await client.get(
+            "/api/waitlist?limit=1",
+            headers={**api_headers, "Origin": "http://localhost:3000"}
+        )
+        assert response.status_code == HTTP_200_OK
+        assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
+
+
+class SesionPostgresFalsa:
+    """
+    Sesión mínima que se presenta como PostgreSQL: devuelve `estimado` para la
+    consulta a pg_class y `conteo_exacto` para el COUNT vía db.query.
+    """
+    
+    def __init__(self, estimado, conteo_exacto):
+        self.estimado = estimado
+        self.conteo_exacto = conteo_exacto
+        self.consultas = []
+    
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    
+    def execute(self, sentencia, params=None):
+        self.consultas.append(str(sentencia))
+        return SimpleNamespace(scalar=lambda: self.estimado)
+    
+    def query(self, *entidades):
+        return SimpleNamespace(scalar=lambda: self.conteo_exacto)
 
 
 class TestContarRegistros:
     """Tests para contar registros."""
     
-    def test_contar_vacio(self, client, api_headers):
+    async def test_contar_vacio(self, client, api_headers):
         """Conteo sin registros retorna 0."""
-        response = client.get("/api/waitlist/count", headers=api_headers)
-        assert response.status_code == status.HTTP_200_OK
+        response = await client.get("/api/waitlist/count", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
         assert response.json()["total"] == 0
     
-    def test_contar_con_registros(self, client, api_headers, registro_valido):
+    async def test_contar_con_registros(self, client, api_headers, registro_factory):
         """Conteo con registros retorna cantidad correcta."""
-        client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        registro_factory()
         
-        response = client.get("/api/waitlist/count", headers=api_headers)
-        assert response.status_code == status.HTTP_200_OK
+        response = await client.get("/api/waitlist/count", headers=api_headers)
+        assert response.status_code == HTTP_200_OK
         assert response.json()["total"] == 1
+    
+    @sincrono
+    @pytest.mark.parametrize("estimado,esperado", [
+        # Estimación por encima del umbral: se usa sin contar
+        (50000, 50000),
+        # Estimación por debajo del umbral: conteo exacto
+        (500, 7),
+        # Tabla sin estimación (to_regclass nulo): conteo exacto
+        (None, 7),
+    ], ids=["estimacion_grande", "estimacion_pequena", "sin_estimacion"])
+    def test_contar_en_postgresql(self, estimado, esperado):
+        """En PostgreSQL se usa pg_class solo a partir de CONTEO_ESTIMADO_MINIMO."""
+        from app.main import contar_waitlist
+        
+        db = SesionPostgresFalsa(estimado=estimado, conteo_exacto=7)
+        assert contar_waitlist(db) == esperado
+        assert "to_regclass(:tabla)" in db.consultas[0]
 
 
 class TestVerificarEmail:
     """Tests para verificar email."""
     
-    def test_email_no_existe(self, client, api_headers):
+    async def test_email_no_existe(self, client, api_headers):
         """Email no registrado retorna exists=False."""
-        response = client.get(
+        response = await client.get(
             "/api/waitlist/check/nuevo@ejemplo.com",
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTP_200_OK
         assert response.json()["exists"] is False
     
-    def test_email_existe(self, client, api_headers, registro_valido):
+    async def test_email_existe(self, client, api_headers, registro_valido, registro_factory):
         """Email registrado retorna exists=True."""
-        client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        registro_factory()
         
-        response = client.get(
+        response = await client.get(
             f"/api/waitlist/check/{registro_valido['email']}",
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTP_200_OK
         assert response.json()["exists"] is True
 
 
 class TestEliminarRegistro:
     """Tests para eliminar registros."""
     
-    def test_eliminar_existente(self, client, api_headers, registro_valido):
+    async def test_eliminar_existente(self, client, api_headers, registro_factory):
         """Eliminar registro existente funciona."""
         # Crear
-        create_response = client.post(
-            "/api/waitlist",
-            json=registro_valido,
-            headers=api_headers
-        )
-        registro_id = create_response.json()["data"]["id"]
+        registro_id = registro_factory().id
         
         # Eliminar
-        response = client.delete(
+        response = await client.delete(
             f"/api/waitlist/{registro_id}",
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTP_200_OK
         assert response.json()["success"] is True
         
         # Verificar eliminación
-        count_response = client.get("/api/waitlist/count", headers=api_headers)
+        count_response = await client.get("/api/waitlist/count", headers=api_headers)
         assert count_response.json()["total"] == 0
     
-    def test_eliminar_no_existente(self, client, api_headers):
+    async def test_eliminar_no_existente(self, client, api_headers):
         """Eliminar registro inexistente retorna 404."""
-        response = client.delete("/api/waitlist/99999", headers=api_headers)
-        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = await client.delete("/api/waitlist/99999", headers=api_headers)
+        assert response.status_code == HTTP_404_NOT_FOUND
 
 
 class TestObtenerRegistro:
     """Tests para obtener registro por ID."""
     
-    def test_obtener_existente(self, client, api_headers, registro_valido):
+    async def test_obtener_existente(self, client, api_headers, registro_factory):
         """Obtener registro existente funciona."""
-        create_response = client.post(
-            "/api/waitlist",
-            json=registro_valido,
-            headers=api_headers
-        )
-        registro_id = create_response.json()["data"]["id"]
+        registro_id = registro_factory().id
         
-        response = client.get(
+        response = await client.get(
             f"/api/waitlist/{registro_id}",
             headers=api_headers
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTP_200_OK
         assert response.json()["nombre"] == "María José"
     
-    def test_obtener_no_existente(self, client, api_headers):
+    async def test_obtener_no_existente(self, client, api_headers):
         """Obtener registro inexistente retorna 404."""
-        response = client.get("/api/waitlist/99999", headers=api_headers)
-        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = await client.get("/api/waitlist/99999", headers=api_headers)
+        assert response.status_code == HTTP_404_NOT_FOUND
+    
+    async def test_fecha_igual_que_al_crear(self, client, api_headers, registro_valido):
+        """La fecha de registro tiene el mismo formato en POST y en GET."""
+        creado = await client.post("/api/waitlist", json=registro_valido, headers=api_headers)
+        data = creado.json()["data"]
+        
+        response = await client.get(f"/api/waitlist/{data['id']}", headers=api_headers)
+        assert response.json()["fecha_registro"] == data["fecha_registro"]
+    
+    async def test_fecha_utc_con_sufijo_z(self):
+        """Las fechas UTC (PostgreSQL) se serializan igual que Pydantic (sufijo Z)."""
+        from app.enums import TipoDocumento
+        from app.main import RespuestaJSON, detalle_registro
+        from app.models import WaitlistEntry
+        from app.schemas import WaitlistDetail
+        
+        registro = WaitlistEntry(
+            id=1,
+            tipo_documento=TipoDocumento.CC,
+            numero_documento="9876543210",
+            nombre="Juan",
+            apellido="Pérez",
+            email="juan@ejemplo.com",
+            indicativo_pais="+57",
+            telefono="3109876543",
+            fecha_registro=datetime(2026, 1, 15, 8, 30, 0, 123456, tzinfo=timezone.utc),
+        )
+        
+        cuerpo = json.loads(RespuestaJSON(detalle_registro(registro)).body)
+        esperado = WaitlistDetail.model_validate(registro).model_dump(mode="json")
+        assert cuerpo["fecha_registro"] == esperado["fecha_registro"] == "2026-01-15T08:30:00.123456Z"
 
 
 class TestPoliticaDatos:
     """Tests para endpoint de política de datos."""
     
-    def test_obtener_politica(self, client, api_headers):
-        """Política de datos está disponible."""
-        response = client.get("/api/legal/politica-datos", headers=api_headers)
-        assert response.status_code == status.HTTP_200_OK
+    async def test_obtener_politica(self, client):
+        """Política de datos está disponible sin API key."""
+        response = await client.get("/api/legal/politica-datos")
+        assert response.status_code == HTTP_200_OK
         data = response.json()
         assert "Ley 1581" in data["ley"]
         assert "Sembradores de Fe" in data["responsable"]
@@ -390,36 +633,36 @@ class TestPoliticaDatos:
 class TestAdminLogin:
     """Tests para login de administrador."""
     
-    def test_login_exitoso(self, client):
+    async def test_login_exitoso(self, client):
         """Login con credenciales correctas retorna API key."""
         # Usa las credenciales por defecto del código
-        response = client.post(
+        response = await client.post(
             "/api/admin/login",
             json={"username": "admin", "password": "admin123"}
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTP_200_OK
         data = response.json()
         assert data["success"] is True
         assert "api_key" in data
         assert len(data["api_key"]) > 0
     
-    def test_login_usuario_incorrecto(self, client):
+    async def test_login_usuario_incorrecto(self, client):
         """Login con usuario incorrecto retorna 401."""
-        response = client.post(
+        response = await client.post(
             "/api/admin/login",
             json={"username": "wrong", "password": "admin123"}
         )
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.status_code == HTTP_401_UNAUTHORIZED
     
-    def test_login_password_incorrecto(self, client):
+    async def test_login_password_incorrecto(self, client):
         """Login con contraseña incorrecta retorna 401."""
-        response = client.post(
+        response = await client.post(
             "/api/admin/login",
             json={"username": "admin", "password": "wrongpass"}
         )
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.status_code == HTTP_401_UNAUTHORIZED
     
-    def test_login_sin_credenciales(self, client):
+    async def test_login_sin_credenciales(self, client):
         """Login sin credenciales retorna 422."""
-        response = client.post("/api/admin/login", json={})
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = await client.post("/api/admin/login", json={})
+        assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY